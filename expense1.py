@@ -1,14 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
+from tkinter import font as tkfont
 from datetime import datetime, timedelta
-from collections import defaultdict
 import sqlite3
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import os
 import shutil
 import csv
 import hashlib
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import base64
+import io
+import hmac
+from functools import partial
+from itertools import islice
 
 # --- FIX: Register SQLite Adapter for Python 3.12+ ---
 def adapt_datetime(ts):
@@ -16,37 +24,216 @@ def adapt_datetime(ts):
 
 sqlite3.register_adapter(datetime, adapt_datetime)
 
+# --- SQL: hot-path statements, kept as constants so sqlite3's statement cache reuses them ---
+INSERT_EXPENSE_SQL = """
+    INSERT INTO expenses (description, amount, category, receipt_path, payer_id, group_id, split_type, created_at_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))
+"""
+INSERT_SPLIT_SQL = "INSERT INTO expense_splits (expense_id, user_id, amount) VALUES (?, ?, ?)"
+LOGIN_USER_SQL = "SELECT user_id, username, password_hash, currency FROM users WHERE username = ?"
+
+# Re-run a full ANALYZE after this many expense inserts so planner stats track growth
+ANALYZE_EVERY = 500
+# Bump when create_tables changes; databases already at this version skip the DDL on startup
+SCHEMA_VERSION = 1
+
+# Secondary indexes on expense_splits, by name; bulk loads drop and rebuild these
+SPLIT_INDEXES = {
+    'idx_splits_expense': "CREATE INDEX IF NOT EXISTS idx_splits_expense ON expense_splits(expense_id)",
+    # Covers the per-user split lookups (summary, categories, balances) without touching the table
+    'idx_splits_user_expense': "CREATE INDEX IF NOT EXISTS idx_splits_user_expense ON expense_splits(user_id, expense_id, amount)",
+}
+
+# SQLite's strftime has no %b/%I/%p, so month names and the 12-hour clock are spelled out
+# here; rows come back display-ready and Python never parses created_at
+MONTH_SQL = "substr('JanFebMarAprMayJunJulAugSepOctNovDec', strftime('%m', {col}) * 3 - 2, 3)"
+DATETIME_FMT_SQL = (MONTH_SQL + " || strftime(' %d, %Y ', {col})"
+                    " || printf('%02d', (strftime('%H', {col}) + 11) % 12 + 1) || strftime(':%M ', {col})"
+                    " || CASE WHEN strftime('%H', {col}) < '12' THEN 'AM' ELSE 'PM' END")
+CREATED_AT_FMT_COLS = DATETIME_FMT_SQL + " AS created_at_fmt"
+
+# Expenses the user paid for or has a share in, newest first. Paid-by-me and
+# split-with-me each seek their own index; UNION dedups the overlap. (The
+# "payer_id = ? OR EXISTS (...)" form avoids the dedup but makes SQLite scan all
+# of expenses, since an OR with a subquery can't drive an index seek.)
+USER_EXPENSES_FROM_SQL = """
+    SELECT *, """ + CREATED_AT_FMT_COLS.format(col="created_at") + """ FROM (
+        SELECT e.*, u.username as payer_name, g.group_name
+        FROM expenses e
+        JOIN users u ON e.payer_id = u.user_id
+        LEFT JOIN groups_table g ON e.group_id = g.group_id
+        WHERE e.payer_id = ?
+        UNION
+        SELECT e.*, u.username as payer_name, g.group_name
+        FROM expenses e
+        JOIN users u ON e.payer_id = u.user_id
+        LEFT JOIN groups_table g ON e.group_id = g.group_id
+        WHERE e.expense_id IN (SELECT expense_id FROM expense_splits WHERE user_id = ?)
+    )
+"""
+USER_EXPENSES_ORDER_SQL = " ORDER BY created_at DESC, expense_id DESC LIMIT ?"
+USER_EXPENSES_SQL = USER_EXPENSES_FROM_SQL + USER_EXPENSES_ORDER_SQL
+# Next page after the (created_at, expense_id) of the last row already shown
+USER_EXPENSES_PAGE_SQL = USER_EXPENSES_FROM_SQL + " WHERE (created_at, expense_id) < (?, ?)" + USER_EXPENSES_ORDER_SQL
+
+# Simplified debts for one user, returned as (other_user_id, signed cents): positive means
+# they owe the user. Same greedy as pairing the largest debtor with the largest creditor:
+# lay debtors (largest debt first) and creditors (largest credit first) out as consecutive
+# intervals on [0, total]; each debtor pays each creditor the length of their overlap.
+# Rows are rounded to integer cents before summing, so both sides total exactly the same.
+# Overlaps are strict, so every returned amount is at least one cent; callers need no epsilon filter.
+USER_DEBTS_SQL = """
+    WITH net AS (
+        SELECT uid, SUM(CAST(ROUND(amt * 100) AS INTEGER)) AS cents FROM (
+            SELECT e.payer_id AS uid, es.amount AS amt
+            FROM expenses e JOIN expense_splits es ON e.expense_id = es.expense_id
+            WHERE e.payer_id != es.user_id
+            UNION ALL
+            SELECT es.user_id, -es.amount
+            FROM expenses e JOIN expense_splits es ON e.expense_id = es.expense_id
+            WHERE e.payer_id != es.user_id
+            UNION ALL
+            SELECT from_user_id, amount FROM settlements
+            UNION ALL
+            SELECT to_user_id, -amount FROM settlements
+        )
+        GROUP BY uid
+        HAVING cents != 0
+    ),
+    debtors AS (
+        SELECT uid, -cents AS amt, SUM(-cents) OVER (ORDER BY cents, uid) AS hi
+        FROM net WHERE cents < 0
+    ),
+    creditors AS (
+        SELECT uid, cents AS amt, SUM(cents) OVER (ORDER BY cents DESC, uid) AS hi
+        FROM net WHERE cents > 0
+    )
+    SELECT CASE WHEN d.uid = :uid THEN c.uid ELSE d.uid END AS other,
+           SUM(CASE WHEN d.uid = :uid THEN -1 ELSE 1 END
+               * (MIN(d.hi, c.hi) - MAX(d.hi - d.amt, c.hi - c.amt))) AS cents
+    FROM debtors d JOIN creditors c
+      ON d.hi - d.amt < c.hi AND c.hi - c.amt < d.hi
+    WHERE d.uid = :uid OR c.uid = :uid
+    GROUP BY other
+"""
+
 # --- UTILITY: Password Hashing ---
+# Bound once; hashlib's OpenSSL backend already uses the CPU's SHA extensions where present.
+# Stored hashes depend on these parameters, so they can't change without a rehash.
+_kdf = partial(hashlib.pbkdf2_hmac, 'sha256', iterations=100000)
+
 def hash_password(password, salt=None):
     if not salt:
         salt = os.urandom(32)
-    key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000)
+    key = _kdf(password.encode('utf-8'), salt)
     return salt + key
 
 def verify_password(stored_password, provided_password):
     salt = stored_password[:32]
     stored_key = stored_password[32:]
-    key = hashlib.pbkdf2_hmac('sha256', provided_password.encode('utf-8'), salt, 100000)
-    return key == stored_key
+    key = _kdf(provided_password.encode('utf-8'), salt)
+    return hmac.compare_digest(key, stored_key)
+
+# --- UTILITY: Charts ---
+_pie_figure = None
+
+def render_pie_png(data, dpi=90):
+    # matplotlib is imported on first use; only Analytics needs it and it's slow to load.
+    # Figure is used directly (no pyplot) so nothing is left in pyplot's global registry
+    global _pie_figure
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Circle
+    # One Figure/Axes for every render; only the pie's artists are rebuilt
+    if _pie_figure is None:
+        _pie_figure = Figure(figsize=(8, 6), facecolor="#F5F5F5")
+        _pie_figure.add_subplot()
+    fig = _pie_figure
+    ax = fig.axes[0]
+    ax.clear()
+    colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99', '#c2c2f0', '#ffb3e6']
+    
+    # Percentages are formatted once here rather than through a per-slice autopct callback
+    sizes = list(data.values())
+    total = sum(sizes)
+    labels = [f"{name}\n{size / total * 100:.1f}%" for name, size in zip(data, sizes)]
+    ax.pie(sizes, labels=labels, colors=colors, startangle=90)
+    ax.add_artist(Circle((0,0),0.70,fc='#F5F5F5'))
+    ax.axis('equal')  
+    ax.set_title("Expenses by Category", fontsize=14, fontweight='bold')
+    
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi, facecolor=fig.get_facecolor())
+    return buf.getvalue()
+
+# --- UTILITY: Background Results ---
+def after_done(widget, future, callback, interval=50):
+    # Poll from the Tk thread so the callback never touches widgets from a worker thread;
+    # stops quietly if the widget was destroyed (e.g. the user navigated away)
+    def poll():
+        if not widget.winfo_exists(): return
+        if future.done(): callback(future.result())
+        else: widget.after(interval, poll)
+    poll()
 
 class DatabaseManager:
     def __init__(self):
         self.db_path = "expenseshare_final.db"
+        # Bumped on every write; keys the per-user balance, summary, category and group caches
+        self.data_version = 0
+        self._balance_cache = {}
+        self._summary_cache = {}
+        self._category_cache = {}
+        self._groups_cache = {}
+        self._inserts_since_analyze = 0
+        # Spare connections for background work; the UI thread keeps its own connection
+        self._pool = queue.Queue()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self._connection = None
         self.connect()
+
+    @property
+    def connection(self):
+        # Inside run_in_background this is the worker's pooled connection
+        conn = getattr(self._local, 'connection', None)
+        return conn if conn is not None else self._connection
+        
+    def open_connection(self, check_same_thread=True):
+        conn = sqlite3.connect(self.db_path, cached_statements=512, check_same_thread=check_same_thread)
+        conn.row_factory = sqlite3.Row
+        # WAL lets reads proceed during writes; NORMAL sync drops one fsync per commit.
+        # busy_timeout makes a pooled reader/writer wait briefly on a lock instead of failing
+        conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA busy_timeout=3000;
+            PRAGMA cache_size=-65536;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+            PRAGMA foreign_keys=ON;
+        """)
+        return conn
         
     def connect(self):
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
+            self._connection = self.open_connection()
             self.create_tables()
         except Exception as e:
             messagebox.showerror("Database Error", f"Error: {e}")
             
     def create_tables(self):
         cursor = self.connection.cursor()
+        # The DDL below only runs once per schema version. Split indexes are the exception:
+        # an interrupted bulk load can leave them dropped
+        if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            for ddl in SPLIT_INDEXES.values():
+                cursor.execute(ddl)
+            self.connection.execute("PRAGMA optimize")
+            return
         
-        # Users Table
-        cursor.execute("""
+        has_rollup = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'category_totals'").fetchone()
+        cursor.executescript("""
+            -- Users Table
             CREATE TABLE IF NOT EXISTS users (
                 user_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 username TEXT UNIQUE NOT NULL,
@@ -54,11 +241,9 @@ class DatabaseManager:
                 email TEXT,
                 currency TEXT DEFAULT 'USD',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Groups Table
-        cursor.execute("""
+            );
+            
+            -- Groups Table
             CREATE TABLE IF NOT EXISTS groups_table (
                 group_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 group_name TEXT NOT NULL,
@@ -66,11 +251,9 @@ class DatabaseManager:
                 created_by INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (created_by) REFERENCES users(user_id)
-            )
-        """)
-        
-        # Group Members
-        cursor.execute("""
+            );
+            
+            -- Group Members
             CREATE TABLE IF NOT EXISTS group_members (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 group_id INTEGER,
@@ -79,11 +262,9 @@ class DatabaseManager:
                 FOREIGN KEY (group_id) REFERENCES groups_table(group_id) ON DELETE CASCADE,
                 FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
                 UNIQUE(group_id, user_id)
-            )
-        """)
-        
-        # Expenses Table
-        cursor.execute("""
+            );
+            
+            -- Expenses Table
             CREATE TABLE IF NOT EXISTS expenses (
                 expense_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 description TEXT NOT NULL,
@@ -94,13 +275,12 @@ class DatabaseManager:
                 group_id INTEGER,
                 split_type TEXT DEFAULT 'equal',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_at_ts INTEGER,
                 FOREIGN KEY (payer_id) REFERENCES users(user_id),
                 FOREIGN KEY (group_id) REFERENCES groups_table(group_id) ON DELETE SET NULL
-            )
-        """)
-        
-        # Expense Splits
-        cursor.execute("""
+            );
+            
+            -- Expense Splits
             CREATE TABLE IF NOT EXISTS expense_splits (
                 split_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 expense_id INTEGER NOT NULL,
@@ -108,11 +288,9 @@ class DatabaseManager:
                 amount REAL NOT NULL,
                 FOREIGN KEY (expense_id) REFERENCES expenses(expense_id) ON DELETE CASCADE,
                 FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Settlements
-        cursor.execute("""
+            );
+            
+            -- Settlements
             CREATE TABLE IF NOT EXISTS settlements (
                 settlement_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 from_user_id INTEGER NOT NULL,
@@ -121,11 +299,9 @@ class DatabaseManager:
                 settled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (from_user_id) REFERENCES users(user_id),
                 FOREIGN KEY (to_user_id) REFERENCES users(user_id)
-            )
-        """)
-        
-        # Friends
-        cursor.execute("""
+            );
+            
+            -- Friends
             CREATE TABLE IF NOT EXISTS friends (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER NOT NULL,
@@ -134,31 +310,94 @@ class DatabaseManager:
                 FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
                 FOREIGN KEY (friend_id) REFERENCES users(user_id) ON DELETE CASCADE,
                 UNIQUE(user_id, friend_id)
-            )
+            );
+            
+            -- Per-user spend by category, kept current by triggers so Analytics reads
+            -- O(categories) rows instead of re-aggregating every split
+            CREATE TABLE IF NOT EXISTS category_totals (
+                user_id INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                total REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, category)
+            ) WITHOUT ROWID;
+            
+            CREATE TRIGGER IF NOT EXISTS trg_splits_category_insert AFTER INSERT ON expense_splits
+            BEGIN
+                INSERT INTO category_totals (user_id, category, total)
+                SELECT NEW.user_id, COALESCE(category, 'General'), NEW.amount FROM expenses WHERE expense_id = NEW.expense_id
+                ON CONFLICT(user_id, category) DO UPDATE SET total = total + excluded.total;
+            END;
+            
+            -- Splits removed by an expense delete are handled by the trigger below,
+            -- since the parent row is already gone when the cascade fires
+            CREATE TRIGGER IF NOT EXISTS trg_splits_category_delete AFTER DELETE ON expense_splits
+            BEGIN
+                UPDATE category_totals SET total = total - OLD.amount
+                WHERE user_id = OLD.user_id
+                  AND category = (SELECT COALESCE(category, 'General') FROM expenses WHERE expense_id = OLD.expense_id);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS trg_expenses_category_delete BEFORE DELETE ON expenses
+            BEGIN
+                UPDATE category_totals SET total = total - (
+                    SELECT SUM(amount) FROM expense_splits
+                    WHERE expense_id = OLD.expense_id AND user_id = category_totals.user_id)
+                WHERE category = COALESCE(OLD.category, 'General')
+                  AND user_id IN (SELECT user_id FROM expense_splits WHERE expense_id = OLD.expense_id);
+            END;
+        """)
+        if not has_rollup:
+            with self.connection:
+                cursor.execute("""
+                    INSERT INTO category_totals (user_id, category, total)
+                    SELECT es.user_id, COALESCE(e.category, 'General'), SUM(es.amount)
+                    FROM expense_splits es JOIN expenses e ON es.expense_id = e.expense_id
+                    GROUP BY es.user_id, COALESCE(e.category, 'General')
+                """)
+        
+        # Older databases lack the epoch column used for date-range filters; backfill it
+        # (ALTER TABLE can't take a non-constant default, so inserts set it explicitly)
+        if not any(col['name'] == 'created_at_ts' for col in cursor.execute("PRAGMA table_info(expenses)")):
+            with self.connection:
+                cursor.execute("ALTER TABLE expenses ADD COLUMN created_at_ts INTEGER")
+                cursor.execute("UPDATE expenses SET created_at_ts = CAST(strftime('%s', created_at) AS INTEGER)")
+        
+        # Indexes on the join/filter columns (UNIQUE constraints already cover
+        # group_members.group_id and friends.user_id)
+        for ddl in SPLIT_INDEXES.values():
+            cursor.execute(ddl)
+        cursor.executescript(f"""
+            CREATE INDEX IF NOT EXISTS idx_expenses_payer_created ON expenses(payer_id, created_at);
+            CREATE INDEX IF NOT EXISTS idx_expenses_group_date ON expenses(group_id, created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_expenses_created_ts ON expenses(created_at_ts);
+            CREATE INDEX IF NOT EXISTS idx_gm_user ON group_members(user_id);
+            CREATE INDEX IF NOT EXISTS idx_settlements_from ON settlements(from_user_id);
+            CREATE INDEX IF NOT EXISTS idx_settlements_to ON settlements(to_user_id);
+            PRAGMA user_version = {SCHEMA_VERSION};
         """)
-        self.connection.commit()
-        cursor.close()
+        # Full ANALYZE once so the planner knows about the indexes; after that
+        # PRAGMA optimize only re-analyzes tables whose stats are missing or stale
+        if not cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            self.connection.execute("ANALYZE")
+        self.connection.execute("PRAGMA optimize")
 
     # --- Auth Methods ---
     def register_user(self, username, password, email=None, currency='USD'):
         try:
-            cursor = self.connection.cursor()
             pwd_hash = hash_password(password)
-            cursor.execute("INSERT INTO users (username, password_hash, email, currency) VALUES (?, ?, ?, ?)", 
-                         (username, pwd_hash, email, currency))
-            self.connection.commit()
-            return cursor.lastrowid
-        except sqlite3.IntegrityError:
-            return None
+            # A taken username yields no row instead of raising IntegrityError
+            with self.connection:
+                row = self.connection.execute("""
+                    INSERT INTO users (username, password_hash, email, currency) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(username) DO NOTHING RETURNING user_id
+                """, (username, pwd_hash, email, currency)).fetchone()
+            return row[0] if row else None
         except Exception as e:
             print(e)
             return None
 
     def login_user(self, username, password):
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT user_id, username, password_hash, currency FROM users WHERE username = ?", (username,))
-        user = cursor.fetchone()
-        cursor.close()
+        user = self.connection.execute(LOGIN_USER_SQL, (username,)).fetchone()
         
         if user and user['password_hash']:
             if verify_password(user['password_hash'], password):
@@ -167,193 +406,270 @@ class DatabaseManager:
 
     # --- Data Methods ---
     def get_all_users(self):
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT user_id, username FROM users ORDER BY username")
-        return cursor.fetchall()
+        return self.connection.execute("SELECT user_id, username FROM users ORDER BY username").fetchall()
+
+    def get_non_friends(self, user_id):
+        # Candidates for the add-friend picker: everyone except the user and existing friends
+        return self.connection.execute("""
+            SELECT u.user_id, u.username FROM users u
+            WHERE u.user_id != ?
+              AND u.user_id NOT IN (SELECT friend_id FROM friends WHERE user_id = ?)
+            ORDER BY u.username
+        """, (user_id, user_id)).fetchall()
 
     def add_friend(self, user_id, friend_id):
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("INSERT OR IGNORE INTO friends (user_id, friend_id) VALUES (?, ?)", (user_id, friend_id))
-            cursor.execute("INSERT OR IGNORE INTO friends (user_id, friend_id) VALUES (?, ?)", (friend_id, user_id))
-            self.connection.commit()
+            with self.connection:
+                self.connection.execute("INSERT OR IGNORE INTO friends (user_id, friend_id) VALUES (?, ?), (?, ?)",
+                                        (user_id, friend_id, friend_id, user_id))
+            self.data_version += 1
             return True
         except: return False
 
     def get_friends(self, user_id):
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        return self.connection.execute("""
             SELECT u.user_id, u.username 
             FROM friends f JOIN users u ON f.friend_id = u.user_id 
             WHERE f.user_id = ? ORDER BY u.username
-        """, (user_id,))
-        return cursor.fetchall()
+        """, (user_id,)).fetchall()
 
     def create_group(self, group_name, created_by, members, color):
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("INSERT INTO groups_table (group_name, color, created_by) VALUES (?, ?, ?)", 
-                         (group_name, color, created_by))
-            gid = cursor.lastrowid
-            for mid in members:
-                cursor.execute("INSERT INTO group_members (group_id, user_id) VALUES (?, ?)", (gid, mid))
-            self.connection.commit()
+            # One transaction for the group row and all member rows; rolls back on error
+            with self.connection:
+                gid = self.connection.execute("INSERT INTO groups_table (group_name, color, created_by) VALUES (?, ?, ?)", 
+                                              (group_name, color, created_by)).lastrowid
+                self.connection.executemany("INSERT INTO group_members (group_id, user_id) VALUES (?, ?)",
+                                            ((gid, mid) for mid in members))
+            self.data_version += 1
             return gid
         except: return None
 
     def get_user_groups(self, user_id):
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        return self.connection.execute("""
             SELECT g.group_id, g.group_name, g.color 
             FROM groups_table g JOIN group_members gm ON g.group_id = gm.group_id
             WHERE gm.user_id = ? ORDER BY g.created_at DESC
-        """, (user_id,))
-        return cursor.fetchall()
+        """, (user_id,)).fetchall()
+
+    def get_user_groups_with_counts(self, user_id):
+        # Same as get_user_groups plus each group's member count, in one query
+        version = self.data_version
+        cached = self._groups_cache.get(user_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        res = self.connection.execute("""
+            SELECT g.group_id, g.group_name, g.color, COUNT(gm2.user_id) AS member_count
+            FROM groups_table g
+            JOIN group_members gm ON g.group_id = gm.group_id
+            JOIN group_members gm2 ON g.group_id = gm2.group_id
+            WHERE gm.user_id = ?
+            GROUP BY g.group_id ORDER BY g.created_at DESC
+        """, (user_id,)).fetchall()
+        self._groups_cache[user_id] = (version, res)
+        return res
 
     def get_group_members(self, group_id):
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        return self.connection.execute("""
             SELECT u.user_id, u.username FROM users u
             JOIN group_members gm ON u.user_id = gm.user_id
             WHERE gm.group_id = ? ORDER BY u.username
-        """, (group_id,))
-        return cursor.fetchall()
+        """, (group_id,)).fetchall()
 
     def add_expense(self, description, amount, category, receipt_path, payer_id, group_id, split_type, splits):
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("""
-                INSERT INTO expenses (description, amount, category, receipt_path, payer_id, group_id, split_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (description, amount, category, receipt_path, payer_id, group_id, split_type))
-            eid = cursor.lastrowid
-            
-            for uid, amt in splits.items():
-                cursor.execute("INSERT INTO expense_splits (expense_id, user_id, amount) VALUES (?, ?, ?)", 
-                             (eid, uid, amt))
-            self.connection.commit()
+            # Expense row and all of its splits commit (or roll back) together
+            with self.connection:
+                eid = self.connection.execute(INSERT_EXPENSE_SQL, (description, amount, category, receipt_path,
+                                                                   payer_id, group_id, split_type)).lastrowid
+                self.connection.executemany(INSERT_SPLIT_SQL, [(eid, uid, amt) for uid, amt in splits.items()])
+            self.data_version += 1
+            self._inserts_since_analyze += 1
+            if self._inserts_since_analyze >= ANALYZE_EVERY:
+                self.connection.execute("ANALYZE")
+                self._inserts_since_analyze = 0
             return eid
         except Exception as e:
             print(e)
             return None
 
+    def bulk_add_expenses(self, expenses):
+        # Backfill path (e.g. CSV import): each item is the add_expense arguments as a tuple.
+        # Split indexes are dropped for the load and rebuilt once at the end; rows go in one transaction.
+        for name in SPLIT_INDEXES:
+            self.connection.execute(f"DROP INDEX IF EXISTS {name}")
+        try:
+            with self.connection:
+                split_rows = []
+                for description, amount, category, receipt_path, payer_id, group_id, split_type, splits in expenses:
+                    eid = self.connection.execute(INSERT_EXPENSE_SQL, (description, amount, category, receipt_path,
+                                                                       payer_id, group_id, split_type)).lastrowid
+                    split_rows.extend((eid, uid, amt) for uid, amt in splits.items())
+                self.connection.executemany(INSERT_SPLIT_SQL, split_rows)
+            self.data_version += 1
+            return True
+        except Exception as e:
+            print(e)
+            return False
+        finally:
+            # Rebuild even if the load rolled back, then refresh planner statistics
+            for ddl in SPLIT_INDEXES.values():
+                self.connection.execute(ddl)
+            self.connection.execute("ANALYZE")
+            self.connection.commit()
+            self._inserts_since_analyze = 0
+
     def get_user_expenses(self, user_id, limit=None):
-        cursor = self.connection.cursor()
-        query = """
-            SELECT DISTINCT e.*, u.username as payer_name, g.group_name
-            FROM expenses e
-            JOIN users u ON e.payer_id = u.user_id
-            LEFT JOIN groups_table g ON e.group_id = g.group_id
-            LEFT JOIN expense_splits es ON e.expense_id = es.expense_id
-            WHERE e.payer_id = ? OR es.user_id = ?
-            ORDER BY e.created_at DESC
-        """
-        if limit: query += f" LIMIT {limit}"
-        cursor.execute(query, (user_id, user_id))
-        return [dict(row) for row in cursor.fetchall()]
+        # LIMIT -1 means "no limit" in SQLite
+        # sqlite3.Row already supports row['col'] access; no per-row dict copy
+        return self.connection.execute(USER_EXPENSES_SQL, (user_id, user_id, limit if limit is not None else -1)).fetchall()
+
+    def iter_user_expenses(self, user_id, page=100):
+        # Same rows as get_user_expenses, fetched a page at a time so the caller only
+        # pulls as many as it needs. Each page is read in full: a half-read cursor left
+        # open between UI events would pin the connection's snapshot and make its
+        # later writes fail with SQLITE_BUSY_SNAPSHOT. Pages continue from the last
+        # row's sort key, so expenses added meanwhile don't shift or repeat rows
+        rows = self.connection.execute(USER_EXPENSES_SQL, (user_id, user_id, page)).fetchall()
+        while True:
+            yield from rows
+            if len(rows) < page: return
+            last = rows[-1]
+            rows = self.connection.execute(USER_EXPENSES_PAGE_SQL, (user_id, user_id, last['created_at'],
+                                                                    last['expense_id'], page)).fetchall()
 
     def get_group_expenses(self, group_id):
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            SELECT e.*, u.username as payer_name
+        return self.connection.execute("""
+            SELECT e.*, u.username as payer_name, g.group_name, """ + CREATED_AT_FMT_COLS.format(col="e.created_at") + """
             FROM expenses e
             JOIN users u ON e.payer_id = u.user_id
+            JOIN groups_table g ON e.group_id = g.group_id
             WHERE e.group_id = ?
             ORDER BY e.created_at DESC
-        """, (group_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        """, (group_id,)).fetchall()
 
     def get_monthly_summary(self, user_id):
         now = datetime.now()
+        # Totals only change on a write or when the month rolls over
+        stamp = (self.data_version, now.year, now.month)
+        cached = self._summary_cache.get(user_id)
+        if cached and cached[0] == stamp:
+            return cached[1]
         first_current = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
         last_month = first_current - timedelta(days=1)
         first_prev = last_month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        cursor = self.connection.cursor()
-        
         def get_total(start, end):
-            # Sum of shares (splits) where user is involved
-            cursor.execute("""
+            # Sum of shares (splits) where user is involved; integer epoch bounds
+            cursor = self.connection.execute("""
                 SELECT SUM(es.amount) 
                 FROM expense_splits es
                 JOIN expenses e ON es.expense_id = e.expense_id
-                WHERE es.user_id = ? AND e.created_at BETWEEN ? AND ?
-            """, (user_id, start, end))
+                WHERE es.user_id = ? AND e.created_at_ts BETWEEN ? AND ?
+            """, (user_id, int(start.timestamp()), int(end.timestamp())))
             res = cursor.fetchone()[0]
             return res if res else 0.0
 
         current_total = get_total(first_current, now)
         prev_total = get_total(first_prev, first_current)
+        self._summary_cache[user_id] = (stamp, (current_total, prev_total))
         return current_total, prev_total
 
     def get_category_breakdown(self, user_id):
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            SELECT e.category, SUM(es.amount) as total
-            FROM expense_splits es
-            JOIN expenses e ON es.expense_id = e.expense_id
-            WHERE es.user_id = ?
-            GROUP BY e.category
+        version = self.data_version
+        cached = self._category_cache.get(user_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        # Maintained by the category_totals triggers
+        cursor = self.connection.execute("""
+            SELECT category, total FROM category_totals
+            WHERE user_id = ? AND total > 0.005
         """, (user_id,))
-        return {row['category']: row['total'] for row in cursor.fetchall()}
+        res = {row['category']: row['total'] for row in cursor}
+        self._category_cache[user_id] = (version, res)
+        return res
 
     def calculate_balances(self, user_id):
-        # Simplified debt algorithm
-        net = defaultdict(float)
-        cursor = self.connection.cursor()
-        
-        # 1. Calculate raw net balances from expenses
-        cursor.execute("SELECT e.payer_id, es.user_id, es.amount FROM expenses e JOIN expense_splits es ON e.expense_id = es.expense_id")
-        for pid, uid, amt in cursor.fetchall():
-            if pid == uid: continue
-            net[pid] += amt
-            net[uid] -= amt
-            
-        # 2. Adjust for settlements
-        cursor.execute("SELECT from_user_id, to_user_id, amount FROM settlements")
-        for fid, tid, amt in cursor.fetchall():
-            net[fid] += amt
-            net[tid] -= amt
-            
-        # 3. Simplify
-        debtors = sorted([(k, v) for k, v in net.items() if v < -0.01], key=lambda x: x[1])
-        creditors = sorted([(k, v) for k, v in net.items() if v > 0.01], key=lambda x: x[1], reverse=True)
-        
-        simplified = []
-        i, j = 0, 0
-        while i < len(debtors) and j < len(creditors):
-            did, damt = debtors[i]
-            cid, camt = creditors[j]
-            amt = min(abs(damt), camt)
-            simplified.append((did, cid, amt))
-            
-            damt += amt
-            camt -= amt
-            
-            if abs(damt) < 0.01: i += 1
-            else: debtors[i] = (did, damt)
-            if abs(camt) < 0.01: j += 1
-            else: creditors[j] = (cid, camt)
-            
-        # Filter for current user
-        res = defaultdict(float)
-        for f, t, a in simplified:
-            if f == user_id: res[t] -= a  # I owe them
-            elif t == user_id: res[f] += a # They owe me
+        # Balances only change when an expense or settlement is written
+        # Version is read before the query, so a write landing mid-query can't be cached as current
+        version = self.data_version
+        cached = self._balance_cache.get(user_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        cursor = self.connection.execute(USER_DEBTS_SQL, {'uid': user_id})
+        res = {other: cents / 100 for other, cents in cursor}
+        self._balance_cache[user_id] = (version, res)
         return res
 
     def settle_balance(self, from_id, to_id, amount):
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("INSERT INTO settlements (from_user_id, to_user_id, amount) VALUES (?, ?, ?)", 
-                         (from_id, to_id, amount))
-            self.connection.commit()
+            with self.connection:
+                self.connection.execute("INSERT INTO settlements (from_user_id, to_user_id, amount) VALUES (?, ?, ?)", 
+                                        (from_id, to_id, amount))
+            self.data_version += 1
             return True
         except: return False
 
+    @contextmanager
+    def acquire(self):
+        # Borrow a pooled connection (opened on demand) for use off the UI thread
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self.open_connection(check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def run_in_background(self, method, *args):
+        # Run a DatabaseManager method on a worker thread with a pooled connection; returns a Future
+        def task():
+            with self.acquire() as conn:
+                self._local.connection = conn
+                try:
+                    return method(*args)
+                finally:
+                    self._local.connection = None
+        return self._executor.submit(task)
+
+    def calculate_balances_async(self, user_id):
+        return self.run_in_background(self.calculate_balances, user_id)
+
+    def get_dashboard_snapshot(self, user_id):
+        # Everything the dashboard shows, read inside one transaction so the
+        # cards, balances and recent list all see the same state
+        conn = self.connection
+        version = self.data_version
+        own_txn = not conn.in_transaction
+        if own_txn: conn.execute("BEGIN")
+        try:
+            return {
+                'month': self.get_monthly_summary(user_id),
+                'balances': self.calculate_balances(user_id),
+                'recent': self.get_user_expenses(user_id, limit=5),
+                'friends': self.get_friends(user_id),
+            }
+        finally:
+            if own_txn: conn.execute("COMMIT")
+            # The snapshot is fixed at its first read; if a write landed since, the summary and
+            # balances cached inside it may carry a newer version than their data, so drop them
+            if self.data_version != version:
+                self._summary_cache.pop(user_id, None)
+                self._balance_cache.pop(user_id, None)
+
+    def get_dashboard_snapshot_async(self, user_id):
+        return self.run_in_background(self.get_dashboard_snapshot, user_id)
+
+    def get_group_details(self, group_id):
+        return {'members': self.get_group_members(group_id), 'expenses': self.get_group_expenses(group_id)}
+
     def close(self):
-        if self.connection: self.connection.close()
+        self._executor.shutdown(wait=True)
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+        if self._connection: self._connection.close()
 
 
 class AuthWindow:
@@ -448,6 +764,14 @@ class ExpenseApp:
         
         self.symbols = {'USD': '$', 'EUR': '€', 'INR': '₹', 'GBP': '£', 'JPY': '¥'}
         self.cur_sym = self.symbols.get(self.currency, '$')
+        self.fmt = f"{self.cur_sym}{{:.2f}}".format
+        # Friends only change through add_friend_dialog, which clears these
+        self.friends_cache = None
+        self.friend_names_cache = None
+        # Last rendered chart as (data key, png); older charts are never shown again
+        self.chart_cache = (None, None)
+        # Add-expense dialog is built once, then withdrawn/deiconified per use
+        self.add_expense_dlg = None
         
         self.root.title(f"ExpenseShare Pro - {self.uname}")
         self.root.geometry("1280x800")
@@ -458,17 +782,40 @@ class ExpenseApp:
         self.setup_styles()
         self.create_layout()
         
+    def load_friends(self):
+        if self.friends_cache is None:
+            self.friends_cache = self.db.get_friends(self.uid)
+        return self.friends_cache
+
+    def friend_names(self):
+        if self.friend_names_cache is None:
+            self.friend_names_cache = {f['user_id']: f['username'] for f in self.load_friends()}
+        return self.friend_names_cache
+
     def setup_styles(self):
         style = ttk.Style()
         style.theme_use('clam')
         style.configure("Card.TFrame", background="white", relief="ridge", borderwidth=1)
         
+        # Named fonts, built once and shared by every view instead of a font tuple per widget
+        self.font_title = tkfont.Font(family="Arial", size=24, weight="bold")
+        self.font_value = tkfont.Font(family="Arial", size=20, weight="bold")
+        self.font_brand = tkfont.Font(family="Arial", size=16, weight="bold")
+        self.font_heading = tkfont.Font(family="Arial", size=14, weight="bold")
+        self.font_large_bold = tkfont.Font(family="Arial", size=12, weight="bold")
+        self.font_large = tkfont.Font(family="Arial", size=12)
+        self.font_nav = tkfont.Font(family="Arial", size=11)
+        self.font_body_bold = tkfont.Font(family="Arial", size=10, weight="bold")
+        self.font_body = tkfont.Font(family="Arial", size=10)
+        self.font_small_bold = tkfont.Font(family="Arial", size=9, weight="bold")
+        self.font_small = tkfont.Font(family="Arial", size=8)
+        
     def create_layout(self):
         sidebar = tk.Frame(self.root, bg="#2C3E50", width=220)
         sidebar.pack(side=tk.LEFT, fill=tk.Y)
         sidebar.pack_propagate(False)
         
-        tk.Label(sidebar, text=f"💰 ExpenseShare", font=("Arial", 16, "bold"), fg="white", bg="#2C3E50").pack(pady=30)
+        tk.Label(sidebar, text=f"💰 ExpenseShare", font=self.font_brand, fg="white", bg="#2C3E50").pack(pady=30)
         
         self.nav_btns = {}
         opts = [("Dashboard", self.view_dashboard), ("Groups", self.view_groups), 
@@ -476,35 +823,59 @@ class ExpenseApp:
                 ("Analytics", self.view_analytics)]
         
         for name, cmd in opts:
-            btn = tk.Button(sidebar, text=f"  {name}", font=("Arial", 11), bg="#34495E", fg="white", bd=0, 
+            btn = tk.Button(sidebar, text=f"  {name}", font=self.font_nav, bg="#34495E", fg="white", bd=0, 
                           anchor="w", padx=20, pady=12, command=cmd, cursor="hand2")
             btn.pack(fill=tk.X, pady=2)
             self.nav_btns[name] = btn
             
-        tk.Button(sidebar, text="  Logout", font=("Arial", 11), bg="#C0392B", fg="white", bd=0, 
+        tk.Button(sidebar, text="  Logout", font=self.font_nav, bg="#C0392B", fg="white", bd=0, 
                  anchor="w", padx=20, pady=12, command=self.root.destroy).pack(side=tk.BOTTOM, fill=tk.X, pady=20)
         
-        self.main_area = tk.Frame(self.root, bg="#F5F5F5")
-        self.main_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.content_area = tk.Frame(self.root, bg="#F5F5F5")
+        self.content_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # One frame per view, hidden rather than destroyed when switching away;
+        # rebuilt only once the database has changed since it was drawn
+        self.views = {}
+        self.view_versions = {}
+        # One handler for every group card instead of a closure per card and label
+        self.root.bind_class("GroupCard", "<Button-1>", self.open_group_card)
+        self.last_nav = (None, 0.0)
         
         self.view_dashboard()
 
-    def clear_main(self):
-        for w in self.main_area.winfo_children(): w.destroy()
+    def show_view(self, name, cache=True):
+        # Drop repeat requests for the same view within 150ms (double clicks)
+        now = time.monotonic()
+        if self.last_nav[0] == name and now - self.last_nav[1] < 0.15:
+            return False
+        self.last_nav = (name, now)
+        
         for b in self.nav_btns.values(): b.config(bg="#34495E")
+        if name in self.nav_btns: self.nav_btns[name].config(bg="#1ABC9C")
+        for f in self.views.values(): f.pack_forget()
+        
+        frame = self.views.get(name)
+        if frame is not None and cache and self.view_versions.get(name) == self.db.data_version:
+            self.main_area = frame
+            frame.pack(fill=tk.BOTH, expand=True)
+            return False
+        if frame is not None: frame.destroy()
+        self.main_area = self.views[name] = tk.Frame(self.content_area, bg="#F5F5F5")
+        self.main_area.pack(fill=tk.BOTH, expand=True)
+        self.view_versions[name] = self.db.data_version
+        return True
 
     # --- VIEW: DASHBOARD ---
     def view_dashboard(self):
-        self.clear_main()
-        self.nav_btns["Dashboard"].config(bg="#1ABC9C")
+        if not self.show_view("Dashboard"): return
         
         top = tk.Frame(self.main_area, bg="#F5F5F5")
         top.pack(fill=tk.X, padx=30, pady=20)
-        tk.Label(top, text="Dashboard", font=("Arial", 24, "bold"), bg="#F5F5F5").pack(side=tk.LEFT)
+        tk.Label(top, text="Dashboard", font=self.font_title, bg="#F5F5F5").pack(side=tk.LEFT)
         
-        tk.Button(top, text="+ Expense", bg="#0288D1", fg="white", font=("Arial", 10, "bold"), 
+        tk.Button(top, text="+ Expense", bg="#0288D1", fg="white", font=self.font_body_bold, 
                  padx=15, pady=8, bd=0, command=self.open_add_expense).pack(side=tk.RIGHT)
-        tk.Button(top, text="Export CSV", bg="#7f8c8d", fg="white", font=("Arial", 10), 
+        tk.Button(top, text="Export CSV", bg="#7f8c8d", fg="white", font=self.font_body, 
                  padx=15, pady=8, bd=0, command=self.export_csv).pack(side=tk.RIGHT, padx=10)
 
         canvas = tk.Canvas(self.main_area, bg="#F5F5F5", highlightthickness=0)
@@ -517,23 +888,14 @@ class ExpenseApp:
         canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=30)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Monthly Summary Cards
-        curr, prev = self.db.get_monthly_summary(self.uid)
-        diff = curr - prev
-        diff_str = f"+{self.cur_sym}{diff:.2f}" if diff >= 0 else f"-{self.cur_sym}{abs(diff):.2f}"
-        color = "#E74C3C" if diff > 0 else "#2ECC71"
-        
+        # Summary, balances and recent expenses arrive together from a worker thread;
+        # cards show a placeholder until then
         stats_frame = tk.Frame(scroll_frame, bg="#F5F5F5")
         stats_frame.pack(fill=tk.X, pady=(0, 20))
         
-        self.create_card(stats_frame, "This Month", f"{self.cur_sym}{curr:.2f}", f"{diff_str} vs last", color)
-        
-        bal = self.db.calculate_balances(self.uid)
-        owed = sum(v for v in bal.values() if v > 0)
-        debt = sum(abs(v) for v in bal.values() if v < 0)
-        
-        self.create_card(stats_frame, "You are owed", f"{self.cur_sym}{owed:.2f}", "", "#27ae60")
-        self.create_card(stats_frame, "You owe", f"{self.cur_sym}{debt:.2f}", "", "#c0392b")
+        self.month_lbl = self.create_card(stats_frame, "This Month", "…")
+        self.owed_lbl = self.create_card(stats_frame, "You are owed", "…", "", "#27ae60")
+        self.debt_lbl = self.create_card(stats_frame, "You owe", "…", "", "#c0392b")
 
         # Content Grid
         content_grid = tk.Frame(scroll_frame, bg="#F5F5F5")
@@ -542,57 +904,105 @@ class ExpenseApp:
         # Recent Expenses (Left)
         left_col = tk.Frame(content_grid, bg="#F5F5F5")
         left_col.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
-        tk.Label(left_col, text="Recent Expenses", font=("Arial", 14, "bold"), bg="#F5F5F5").pack(anchor="w", pady=(0, 10))
+        tk.Label(left_col, text="Recent Expenses", font=self.font_heading, bg="#F5F5F5").pack(anchor="w", pady=(0, 10))
         
-        self.render_expense_list(left_col, self.db.get_user_expenses(self.uid, limit=5))
+        self.recent_col = left_col
+        self.recent_loading = tk.Label(left_col, text="Loading…", bg="#F5F5F5", fg="#95a5a6")
+        self.recent_loading.pack(anchor="w")
 
         # Friends Balances (Right) - FIXED PACK
         right_col = tk.Frame(content_grid, bg="#F5F5F5", width=300) 
         right_col.pack(side=tk.LEFT, fill=tk.BOTH, padx=(10, 0))
         right_col.pack_propagate(False)
         
-        tk.Label(right_col, text="Friends Balances", font=("Arial", 14, "bold"), bg="#F5F5F5").pack(anchor="w", pady=(0, 10))
-        self.render_balances(right_col, bal)
+        tk.Label(right_col, text="Friends Balances", font=self.font_heading, bg="#F5F5F5").pack(anchor="w", pady=(0, 10))
+        self.render_balances(right_col)
+        version = self.db.data_version
+        after_done(right_col, self.db.get_dashboard_snapshot_async(self.uid),
+                   lambda snap: self.show_dashboard_snapshot(snap, version))
+
+    def show_dashboard_snapshot(self, snap, version):
+        # The snapshot's friends list seeds the app-wide cache the balance rows read names from,
+        # unless it arrived late: a friend added meanwhile must not be overwritten by the old list
+        names = {f['user_id']: f['username'] for f in snap['friends']}
+        if self.friends_cache is None and self.db.data_version == version:
+            self.friends_cache, self.friend_names_cache = snap['friends'], names
+        curr, prev = snap['month']
+        diff = curr - prev
+        diff_str = f"+{self.fmt(diff)}" if diff >= 0 else f"-{self.fmt(abs(diff))}"
+        self.month_lbl.config(text=self.fmt(curr))
+        self.month_lbl.sub.config(text=f"{diff_str} vs last", fg="#E74C3C" if diff > 0 else "#2ECC71")
+        self.month_lbl.sub.pack(anchor="w")
+        
+        self.recent_loading.destroy()
+        self.render_expense_table(self.recent_col, snap['recent'], height=5,
+                                  displaycolumns=("desc", "cat", "amt", "date"))
+        self.update_balances(snap['balances'], names)
+        self.root.after_idle(self.prefetch_views)
+
+    def prefetch_views(self):
+        # Warm the caches behind the views users usually open next, while the dashboard sits idle;
+        # results land in DatabaseManager's version-keyed caches, so nothing to collect here
+        self.db.run_in_background(self.db.get_category_breakdown, self.uid)
+        self.db.run_in_background(self.db.get_user_groups_with_counts, self.uid)
+
+    def update_balances(self, bal, names=None):
+        owed = debt = 0.0
+        for v in bal.values():
+            if v > 0: owed += v
+            elif v < 0: debt -= v
+        self.owed_lbl.config(text=self.fmt(owed))
+        self.debt_lbl.config(text=self.fmt(debt))
+        self.update_balance_rows(bal, names)
 
     def create_card(self, parent, title, value, sub="", sub_col="black"):
         c = tk.Frame(parent, bg="white", padx=20, pady=15, relief=tk.RIDGE, bd=1)
         c.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
-        tk.Label(c, text=title, font=("Arial", 10), fg="#7f8c8d", bg="white").pack(anchor="w")
-        tk.Label(c, text=value, font=("Arial", 20, "bold"), bg="white").pack(anchor="w", pady=5)
-        if sub: tk.Label(c, text=sub, font=("Arial", 9, "bold"), fg=sub_col, bg="white").pack(anchor="w")
+        tk.Label(c, text=title, font=self.font_body, fg="#7f8c8d", bg="white").pack(anchor="w")
+        value_lbl = tk.Label(c, text=value, font=self.font_value, bg="white")
+        value_lbl.pack(anchor="w", pady=5)
+        # Kept on the value label so async loaders can fill it in later
+        value_lbl.sub = tk.Label(c, text=sub, font=self.font_small_bold, fg=sub_col, bg="white")
+        if sub: value_lbl.sub.pack(anchor="w")
+        return value_lbl
 
     # --- VIEW: GROUPS ---
     def view_groups(self):
-        self.clear_main()
-        self.nav_btns["Groups"].config(bg="#1ABC9C")
+        if not self.show_view("Groups"): return
         
         top = tk.Frame(self.main_area, bg="#F5F5F5")
         top.pack(fill=tk.X, padx=30, pady=20)
-        tk.Label(top, text="Groups", font=("Arial", 24, "bold"), bg="#F5F5F5").pack(side=tk.LEFT)
-        tk.Button(top, text="+ Create Group", bg="#0288D1", fg="white", font=("Arial", 10), 
+        tk.Label(top, text="Groups", font=self.font_title, bg="#F5F5F5").pack(side=tk.LEFT)
+        tk.Button(top, text="+ Create Group", bg="#0288D1", fg="white", font=self.font_body, 
                  padx=15, pady=8, bd=0, command=self.create_group_dialog).pack(side=tk.RIGHT)
         
         container = tk.Frame(self.main_area, bg="#F5F5F5")
         container.pack(fill=tk.BOTH, expand=True, padx=30)
+        loading = tk.Label(container, text="Loading…", bg="#F5F5F5", fg="#999", font=self.font_large)
+        loading.pack(pady=50)
         
-        groups = self.db.get_user_groups(self.uid)
+        def show_groups(groups):
+            loading.destroy()
+            self.render_group_cards(container, groups)
+        after_done(container, self.db.run_in_background(self.db.get_user_groups_with_counts, self.uid), show_groups)
+
+    def render_group_cards(self, container, groups):
         if not groups:
-            tk.Label(container, text="No groups yet.", bg="#F5F5F5", fg="#999", font=("Arial", 12)).pack(pady=50)
+            tk.Label(container, text="No groups yet.", bg="#F5F5F5", fg="#999", font=self.font_large).pack(pady=50)
             return
 
         row, col = 0, 0
         for g in groups:
-            mems = self.db.get_group_members(g['group_id'])
             card = tk.Frame(container, bg=g['color'], relief=tk.RIDGE, bd=1, cursor="hand2")
             card.grid(row=row, column=col, padx=10, pady=10, sticky="nsew", ipadx=20, ipady=20)
             
-            tk.Label(card, text=g['group_name'], font=("Arial", 14, "bold"), bg=g['color']).pack(pady=(10,5))
-            tk.Label(card, text=f"{len(mems)} members", font=("Arial", 10), bg=g['color'], fg="#555").pack()
+            tk.Label(card, text=g['group_name'], font=self.font_heading, bg=g['color']).pack(pady=(10,5))
+            tk.Label(card, text=f"{g['member_count']} members", font=self.font_body, bg=g['color'], fg="#555").pack()
             
-            # Click to view details
-            card.bind("<Button-1>", lambda e, gid=g['group_id'], gn=g['group_name']: self.show_group_details(gid, gn))
-            for child in card.winfo_children():
-                child.bind("<Button-1>", lambda e, gid=g['group_id'], gn=g['group_name']: self.show_group_details(gid, gn))
+            # Click to view details; handled by the one GroupCard class binding
+            card.group = (g['group_id'], g['group_name'])
+            for w in (card, *card.winfo_children()):
+                w.bindtags(("GroupCard",) + w.bindtags())
                 
             col += 1
             if col > 2:
@@ -601,169 +1011,256 @@ class ExpenseApp:
         
         for i in range(3): container.columnconfigure(i, weight=1)
 
+    def open_group_card(self, event):
+        card = event.widget if hasattr(event.widget, 'group') else event.widget.master
+        self.show_group_details(*card.group)
+
     def show_group_details(self, gid, gname):
-        self.clear_main()
+        if not self.show_view("GroupDetails", cache=False): return
         top = tk.Frame(self.main_area, bg="#F5F5F5")
         top.pack(fill=tk.X, padx=30, pady=20)
         
-        tk.Label(top, text=gname, font=("Arial", 24, "bold"), bg="#F5F5F5").pack(side=tk.LEFT)
+        tk.Label(top, text=gname, font=self.font_title, bg="#F5F5F5").pack(side=tk.LEFT)
         tk.Button(top, text="Back", command=self.view_groups).pack(side=tk.RIGHT, padx=5)
         
         content = tk.Frame(self.main_area, bg="#F5F5F5")
         content.pack(fill=tk.BOTH, expand=True, padx=30)
         
-        mems = [m['username'] for m in self.db.get_group_members(gid)]
-        tk.Label(content, text=f"Members: {', '.join(mems)}", bg="white", padx=10, pady=10, relief=tk.RIDGE).pack(fill=tk.X, pady=(0,20))
+        members_lbl = tk.Label(content, text="Members: …", bg="white", padx=10, pady=10, relief=tk.RIDGE)
+        members_lbl.pack(fill=tk.X, pady=(0,20))
         
-        tk.Label(content, text="Group Expenses", font=("Arial", 14, "bold"), bg="#F5F5F5").pack(anchor="w", pady=(0,10))
-        exps = self.db.get_group_expenses(gid)
-        self.render_expense_list(content, exps)
+        tk.Label(content, text="Group Expenses", font=self.font_heading, bg="#F5F5F5").pack(anchor="w", pady=(0,10))
+        
+        def show_details(details):
+            mems = [m['username'] for m in details['members']]
+            members_lbl.config(text=f"Members: {', '.join(mems)}")
+            self.render_expense_table(content, details['expenses'])
+        after_done(content, self.db.run_in_background(self.db.get_group_details, gid), show_details)
 
     # --- VIEW: FRIENDS ---
     def view_friends(self):
-        self.clear_main()
-        self.nav_btns["Friends"].config(bg="#1ABC9C")
+        if not self.show_view("Friends"): return
         
         top = tk.Frame(self.main_area, bg="#F5F5F5")
         top.pack(fill=tk.X, padx=30, pady=20)
-        tk.Label(top, text="Friends", font=("Arial", 24, "bold"), bg="#F5F5F5").pack(side=tk.LEFT)
-        tk.Button(top, text="+ Add Friend", bg="#0288D1", fg="white", font=("Arial", 10), 
+        tk.Label(top, text="Friends", font=self.font_title, bg="#F5F5F5").pack(side=tk.LEFT)
+        tk.Button(top, text="+ Add Friend", bg="#0288D1", fg="white", font=self.font_body, 
                  padx=15, pady=8, bd=0, command=self.add_friend_dialog).pack(side=tk.RIGHT)
         
         container = tk.Frame(self.main_area, bg="white", relief=tk.RIDGE, bd=1)
         container.pack(fill=tk.BOTH, expand=True, padx=30, pady=10)
         
-        friends = self.db.get_friends(self.uid)
-        bal = self.db.calculate_balances(self.uid)
+        friends = self.load_friends()
         
         if not friends:
              tk.Label(container, text="No friends added.", bg="white", fg="#999").pack(pady=50)
-        else:
+             return
+        
+        loading = tk.Label(container, text="Loading…", bg="white", fg="#999")
+        loading.pack(pady=50)
+        
+        def show_rows(bal):
+            loading.destroy()
+            rows = []
             for f in friends:
-                fid = f['user_id']
-                row = tk.Frame(container, bg="white", padx=20, pady=15, relief=tk.GROOVE, bd=1)
-                row.pack(fill=tk.X, pady=5, padx=10)
-                
-                tk.Label(row, text=f['username'], font=("Arial", 12, "bold"), bg="white").pack(side=tk.LEFT)
-                
-                amt = bal.get(fid, 0)
+                amt = bal.get(f['user_id'], 0)
                 if abs(amt) < 0.01:
                     txt, col = "Settled up", "#999"
                 elif amt > 0:
-                    txt, col = f"Owes you {self.cur_sym}{amt:.2f}", "#27ae60"
+                    txt, col = f"Owes you {self.fmt(amt)}", "#27ae60"
                 else:
-                    txt, col = f"You owe {self.cur_sym}{abs(amt):.2f}", "#c0392b"
-                    
-                tk.Label(row, text=txt, font=("Arial", 10, "bold"), fg=col, bg="white").pack(side=tk.RIGHT)
+                    txt, col = f"You owe {self.fmt(abs(amt))}", "#c0392b"
+                rows.append((f['username'], txt, col))
+            self.render_virtual_rows(container, rows)
+        after_done(container, self.db.calculate_balances_async(self.uid), show_rows)
 
     # --- VIEW: ACTIVITY ---
     def view_activity(self):
-        self.clear_main()
-        self.nav_btns["Activity"].config(bg="#1ABC9C")
+        if not self.show_view("Activity"): return
         
-        tk.Label(self.main_area, text="Activity Feed", font=("Arial", 24, "bold"), bg="#F5F5F5").pack(anchor="w", padx=30, pady=20)
+        tk.Label(self.main_area, text="Activity Feed", font=self.font_title, bg="#F5F5F5").pack(anchor="w", padx=30, pady=20)
         
         container = tk.Frame(self.main_area, bg="#F5F5F5")
-        container.pack(fill=tk.BOTH, expand=True, padx=30)
-        
-        canvas = tk.Canvas(container, bg="#F5F5F5", highlightthickness=0)
-        scroll = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        scroll_frame = tk.Frame(canvas, bg="#F5F5F5")
-        
-        scroll_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=scroll_frame, anchor="nw", width=1000)
-        canvas.configure(yscrollcommand=scroll.set)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        container.pack(fill=tk.BOTH, expand=True, padx=30, pady=(0, 20))
         
-        self.render_expense_list(scroll_frame, self.db.get_user_expenses(self.uid))
+        self.render_expense_table(container, self.db.iter_user_expenses(self.uid))
 
     # --- VIEW: ANALYTICS ---
     def view_analytics(self):
-        self.clear_main()
-        self.nav_btns["Analytics"].config(bg="#1ABC9C")
+        if not self.show_view("Analytics"): return
         
-        tk.Label(self.main_area, text="Spending Analytics", font=("Arial", 24, "bold"), bg="#F5F5F5").pack(anchor="w", padx=30, pady=20)
+        frame = self.main_area
+        tk.Label(frame, text="Spending Analytics", font=self.font_title, bg="#F5F5F5").pack(anchor="w", padx=30, pady=20)
+        loading = tk.Label(frame, text="Loading…", font=self.font_large, bg="#F5F5F5", fg="#999")
+        loading.pack(pady=50)
         
-        data = self.db.get_category_breakdown(self.uid)
+        def show_chart(data):
+            loading.destroy()
+            self.render_category_chart(frame, data)
+        after_done(frame, self.db.run_in_background(self.db.get_category_breakdown, self.uid), show_chart)
+
+    def render_category_chart(self, frame, data):
         if not data:
-            tk.Label(self.main_area, text="Not enough data to generate charts.", font=("Arial", 12), bg="#F5F5F5").pack(pady=50)
+            tk.Label(frame, text="Not enough data to generate charts.", font=self.font_large, bg="#F5F5F5").pack(pady=50)
             return
 
-        fig, ax = plt.subplots(figsize=(8, 6), facecolor="#F5F5F5")
-        labels = list(data.keys())
-        sizes = list(data.values())
-        colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99', '#c2c2f0', '#ffb3e6']
-        
-        ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90, pctdistance=0.85)
-        centre_circle = plt.Circle((0,0),0.70,fc='#F5F5F5')
-        fig.gca().add_artist(centre_circle)
-        ax.axis('equal')  
-        ax.set_title("Expenses by Category", fontsize=14, fontweight='bold')
-        
-        canvas = FigureCanvasTkAgg(fig, master=self.main_area)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=30, pady=10)
+        # The last chart is kept with its data, so revisiting Analytics unchanged skips matplotlib
+        key = tuple(data.items())
+        if self.chart_cache[0] == key:
+            png = self.chart_cache[1]
+        else:
+            png = render_pie_png(data)
+            self.chart_cache = (key, png)
+        img = tk.PhotoImage(data=base64.b64encode(png))
+        chart = tk.Label(frame, image=img, bg="#F5F5F5")
+        chart.image = img  # Tk doesn't hold a reference to the image
+        chart.pack(fill=tk.BOTH, expand=True, padx=30, pady=10)
 
     # --- HELPERS ---
-    def render_expense_list(self, parent, expenses):
-        if not expenses:
+    def render_expense_table(self, parent, expenses, batch=100, height=10, displaycolumns="#all"):
+        # One Treeview for long lists: Tk draws only the visible rows, no widgets per expense.
+        # `expenses` may be a lazy iterator; rows are pulled a batch at a time as the user scrolls
+        rows = iter(expenses)
+        first = list(islice(rows, batch))
+        if not first:
             tk.Label(parent, text="No activity yet.", bg="#F5F5F5", fg="#7f8c8d").pack(anchor="w")
             return
-            
-        for e in expenses:
-            f = tk.Frame(parent, bg="white", padx=15, pady=10, relief=tk.FLAT)
-            f.pack(fill=tk.X, pady=2)
-            
-            row1 = tk.Frame(f, bg="white")
-            row1.pack(fill=tk.X)
-            dt = datetime.fromisoformat(e['created_at']).strftime("%b %d")
-            tk.Label(row1, text=f"{dt} • {e.get('category','General')}", font=("Arial", 8, "bold"), fg="#95a5a6", bg="white").pack(side=tk.LEFT)
-            
-            if e['receipt_path']:
-                lbl = tk.Label(row1, text="📎 Receipt", font=("Arial", 8), fg="#3498db", bg="white", cursor="hand2")
-                lbl.pack(side=tk.RIGHT)
-                lbl.bind("<Button-1>", lambda ev, p=e['receipt_path']: self.show_receipt(p))
-            
-            row2 = tk.Frame(f, bg="white")
-            row2.pack(fill=tk.X, pady=(2, 0))
-            tk.Label(row2, text=e['description'], font=("Arial", 11, "bold"), bg="white").pack(side=tk.LEFT)
-            
-            amt_col = "#e74c3c" if e['payer_id'] == self.uid else "#2c3e50"
-            tk.Label(row2, text=f"{self.cur_sym}{e['amount']:.2f}", font=("Arial", 11, "bold"), fg=amt_col, bg="white").pack(side=tk.RIGHT)
-            
-            group_txt = e['group_name'] if e['group_name'] else "Personal"
-            tk.Label(f, text=f"Paid by {e['payer_name']} in {group_txt}", font=("Arial", 9), fg="#7f8c8d", bg="white").pack(anchor="w")
-
-    def render_balances(self, parent, balances):
-        friends = self.db.get_friends(self.uid)
-        friends_map = {f['user_id']: f['username'] for f in friends}
         
-        container = tk.Frame(parent, bg="white", relief=tk.RIDGE, bd=1)
-        container.pack(fill=tk.X)
+        frame = tk.Frame(parent, bg="#F5F5F5")
+        frame.pack(fill=tk.BOTH, expand=True)
+        cols = ("desc", "cat", "amt", "payer", "grp", "date")
+        tree = ttk.Treeview(frame, columns=cols, show="headings", height=height, displaycolumns=displaycolumns)
+        for col, text, width, anchor in (("desc", "Description", 240, "w"), ("cat", "Category", 130, "w"),
+                                         ("amt", "Amount", 100, "e"), ("payer", "Paid By", 130, "w"),
+                                         ("grp", "Group", 150, "w"), ("date", "Date", 170, "w")):
+            tree.heading(col, text=text)
+            tree.column(col, width=width, anchor=anchor)
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
-        has_bal = False
-        for uid, amount in balances.items():
-            if abs(amount) < 0.01: continue
-            has_bal = True
-            name = friends_map.get(uid, f"User {uid}")
-            
-            row = tk.Frame(container, bg="white", padx=10, pady=8)
-            row.pack(fill=tk.X, pady=1)
-            
-            tk.Label(row, text=name, font=("Arial", 10), bg="white").pack(side=tk.LEFT)
-            col = "#27ae60" if amount > 0 else "#c0392b"
-            txt = f"owes you {self.cur_sym}{amount:.2f}" if amount > 0 else f"you owe {self.cur_sym}{abs(amount):.2f}"
-            tk.Label(row, text=txt, font=("Arial", 9, "bold"), fg=col, bg="white").pack(side=tk.RIGHT)
-            tk.Button(row, text="Settle", bg="#ecf0f1", bd=0, font=("Arial", 8), 
-                     command=lambda u=uid, n=name, a=amount: self.settle_up(u, n, a)).pack(side=tk.RIGHT, padx=5)
+        # Expenses the user paid for are coloured through one tag rather than per-row widgets
+        tree.tag_configure("paid", foreground="#e74c3c")
+        receipts = {}
+        fmt, uid = self.fmt, self.uid
+        def add_rows(chunk):
+            for e in chunk:
+                desc = f"📎 {e['description']}" if e['receipt_path'] else e['description']
+                iid = tree.insert("", "end", values=(desc, e['category'] or "General", fmt(e['amount']),
+                                                     e['payer_name'], e['group_name'] or "Personal", e['created_at_fmt']),
+                                  tags=("paid",) if e['payer_id'] == uid else ())
+                if e['receipt_path']: receipts[iid] = e['receipt_path']
+            return len(chunk) == batch
+        more = add_rows(first)
+        
+        # Fetch the next batch once the view nears the bottom (or isn't full yet)
+        def on_scroll(lo, hi):
+            nonlocal more
+            scroll.set(lo, hi)
+            if more and float(hi) > 0.9:
+                more = add_rows(list(islice(rows, batch)))
+        tree.configure(yscrollcommand=on_scroll)
+        
+        # Double-click a 📎 row to open its receipt
+        def open_receipt(event):
+            iid = tree.identify_row(event.y)
+            if iid in receipts: self.show_receipt(receipts[iid])
+        tree.bind("<Double-1>", open_receipt)
+
+    def render_virtual_rows(self, parent, rows, row_height=56):
+        # Rows are (name, status, status_color). Only the rows inside the viewport are drawn,
+        # as canvas items, so scrolling cost doesn't grow with the number of rows.
+        canvas = tk.Canvas(parent, bg="white", highlightthickness=0, yscrollincrement=row_height)
+        scroll = ttk.Scrollbar(parent, orient="vertical")
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=5)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.configure(yscrollcommand=scroll.set, scrollregion=(0, 0, 0, len(rows) * row_height))
+        
+        def redraw(event=None):
+            canvas.delete("row")
+            top, width = canvas.canvasy(0), canvas.winfo_width()
+            first = max(int(top // row_height), 0)
+            last = min(len(rows), int((top + canvas.winfo_height()) // row_height) + 1)
+            for i in range(first, last):
+                name, txt, col = rows[i]
+                y = i * row_height
+                canvas.create_rectangle(0, y + 5, width - 1, y + row_height - 5, outline="#ddd", fill="white", tags="row")
+                canvas.create_text(20, y + row_height / 2, text=name, anchor="w", font=self.font_large_bold, tags="row")
+                canvas.create_text(width - 20, y + row_height / 2, text=txt, anchor="e", fill=col,
+                                   font=self.font_body_bold, tags="row")
+        
+        def yview(*args):
+            canvas.yview(*args)
+            redraw()
+        
+        def on_wheel(event):
+            step = -1 if event.num == 4 or event.delta > 0 else 1
+            yview("scroll", step, "units")
+        
+        scroll.configure(command=yview)
+        canvas.bind("<Configure>", redraw)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            canvas.bind(seq, on_wheel)
+
+    def render_balances(self, parent):
+        # Rows are gridded into one container and kept in a pool, so a refresh
+        # (e.g. after settling up) only updates their StringVars
+        self.balance_box = tk.Frame(parent, bg="white", relief=tk.RIDGE, bd=1)
+        self.balance_box.pack(fill=tk.X)
+        self.balance_box.columnconfigure(0, weight=1)
+        self.balance_rows = []
+        self.balance_msg = tk.Label(self.balance_box, text="Loading…", bg="white", fg="#95a5a6", pady=20)
+        self.balance_msg.grid(row=0, column=0)
+
+    def make_balance_row(self):
+        row = tk.Frame(self.balance_box, bg="white", padx=10, pady=8)
+        row.name_var, row.txt_var = tk.StringVar(), tk.StringVar()
+        tk.Label(row, textvariable=row.name_var, font=self.font_body, bg="white").pack(side=tk.LEFT)
+        row.txt_lbl = tk.Label(row, textvariable=row.txt_var, font=self.font_small_bold, bg="white")
+        row.txt_lbl.pack(side=tk.RIGHT)
+        tk.Button(row, text="Settle", bg="#ecf0f1", bd=0, font=self.font_small, 
+                 command=lambda: self.settle_up(*row.data)).pack(side=tk.RIGHT, padx=5)
+        self.balance_rows.append(row)
+        return row
+
+    def update_balance_rows(self, balances, names=None):
+        # USER_DEBTS_SQL only returns non-zero balances, so every entry gets a row
+        items = list(balances.items())
+        if not items:
+            # Common all-settled case: no friend lookup, just hide the pooled rows
+            for row in self.balance_rows: row.grid_remove()
+            self.balance_msg.config(text="Settled up! 🎉")
+            self.balance_msg.grid(row=0, column=0)
+            return
         
-        if not has_bal:
-            tk.Label(container, text="Settled up! 🎉", bg="white", fg="#95a5a6", pady=20).pack()
+        friends_map = names if names is not None else self.friend_names()
+        for i, (uid, amount) in enumerate(items):
+            row = self.balance_rows[i] if i < len(self.balance_rows) else self.make_balance_row()
+            name = friends_map.get(uid, f"User {uid}")
+            row.data = (uid, name, amount)
+            row.name_var.set(name)
+            if amount > 0:
+                row.txt_var.set(f"owes you {self.fmt(amount)}")
+                row.txt_lbl.config(fg="#27ae60")
+            else:
+                row.txt_var.set(f"you owe {self.fmt(abs(amount))}")
+                row.txt_lbl.config(fg="#c0392b")
+            row.grid(row=i, column=0, sticky="ew", pady=1)
+        for row in self.balance_rows[len(items):]:
+            row.grid_remove()
+        self.balance_msg.grid_remove()
 
     # --- DIALOGS & ACTIONS ---
     def open_add_expense(self):
-        AddExpenseDialog(self.root, self.db, self.uid, self.uname, self.currency)
+        dlg = self.add_expense_dlg
+        if dlg and dlg.win.winfo_exists():
+            # Only a hidden dialog is cleared; an open one keeps what the user has typed
+            if dlg.win.state() == "withdrawn":
+                dlg.reset(self.load_friends())
+                dlg.win.deiconify()
+            dlg.win.lift()
+        else:
+            self.add_expense_dlg = AddExpenseDialog(self.root, self.db, self.uid, self.uname, self.currency, self.load_friends())
 
     def show_receipt(self, path):
         if os.path.exists(path):
@@ -777,26 +1274,34 @@ class ExpenseApp:
 
     def settle_up(self, friend_id, name, amount):
         if amount > 0:
-            msg = f"{name} owes you {self.cur_sym}{amount:.2f}. Confirm they paid you?"
+            msg = f"{name} owes you {self.fmt(amount)}. Confirm they paid you?"
             fid, tid = friend_id, self.uid
         else:
-            msg = f"You owe {name} {self.cur_sym}{abs(amount):.2f}. Confirm you paid them?"
+            msg = f"You owe {name} {self.fmt(abs(amount))}. Confirm you paid them?"
             fid, tid = self.uid, friend_id
             
         if messagebox.askyesno("Settle Up", msg):
-            self.db.settle_balance(fid, tid, abs(amount))
-            self.view_dashboard()
+            before = self.db.data_version
+            if not self.db.settle_balance(fid, tid, abs(amount)):
+                return messagebox.showerror("Error", "Could not record the settlement.")
+            # The rest of the dashboard doesn't depend on settlements, so it stays current,
+            # unless it was already stale before this write
+            if self.view_versions.get("Dashboard") == before:
+                self.view_versions["Dashboard"] = self.db.data_version
+            # Settlements only move balances; refresh those in place instead of rebuilding the view
+            after_done(self.balance_box, self.db.calculate_balances_async(self.uid), self.update_balances)
 
     def export_csv(self):
         filename = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
         if not filename: return
-        exps = self.db.get_user_expenses(self.uid)
         try:
             with open(filename, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow(['Date', 'Description', 'Category', 'Amount', 'Currency', 'Payer', 'Group', 'Type'])
-                for e in exps:
-                    writer.writerow([e['created_at'], e['description'], e['category'], e['amount'], self.currency, e['payer_name'], e['group_name'] or 'Personal', e['split_type']])
+                # Rows stream from the cursor straight into the file; the full list is never built
+                writer.writerows((r['created_at'], r['description'], r['category'], r['amount'], self.currency,
+                                  r['payer_name'], r['group_name'] or 'Personal', r['split_type'])
+                                 for r in self.db.iter_user_expenses(self.uid))
             messagebox.showinfo("Success", "Export successful!")
         except Exception as e: messagebox.showerror("Error", str(e))
 
@@ -813,7 +1318,7 @@ class ExpenseApp:
         frame.pack(fill=tk.BOTH, expand=True)
         
         vars = {}
-        for f in self.db.get_friends(self.uid):
+        for f in self.load_friends():
             v = tk.BooleanVar()
             tk.Checkbutton(frame, text=f['username'], variable=v).pack(anchor="w")
             vars[f['user_id']] = v
@@ -832,9 +1337,7 @@ class ExpenseApp:
         d.geometry("300x200")
         tk.Label(d, text="Select User").pack(pady=10)
         
-        users = self.db.get_all_users()
-        current_friends = [f['user_id'] for f in self.db.get_friends(self.uid)]
-        avail = [u for u in users if u['user_id'] != self.uid and u['user_id'] not in current_friends]
+        avail = self.db.get_non_friends(self.uid)
         
         if not avail:
             tk.Label(d, text="No users available").pack()
@@ -846,6 +1349,7 @@ class ExpenseApp:
         def add():
             u = next((x for x in avail if x['username'] == combo.get()), None)
             if u and self.db.add_friend(self.uid, u['user_id']):
+                self.friends_cache = self.friend_names_cache = None
                 messagebox.showinfo("Success", "Friend added!")
                 d.destroy()
                 self.view_friends()
@@ -853,16 +1357,24 @@ class ExpenseApp:
 
 
 class AddExpenseDialog:
-    def __init__(self, parent, db, user_id, username, currency):
+    def __init__(self, parent, db, user_id, username, currency, friends=None):
         self.db = db
         self.uid = user_id
         self.uname = username
         self.curr = currency
         self.receipt_path = None
+        self.receipt_src = None
+        # Future of the in-flight save, if any; the form isn't reset or resubmitted until it lands
+        self.pending = None
+        # Participant lists, fetched once per dialog / per group instead of on every group switch
+        self.friends = friends if friends is not None else self.db.get_friends(self.uid)
+        self.members_by_group = {}
         
         self.win = tk.Toplevel(parent)
         self.win.title("Add Expense")
         self.win.geometry("500x750")
+        # Closing only hides the window so ExpenseApp can reuse the widget tree
+        self.win.protocol("WM_DELETE_WINDOW", self.win.withdraw)
         self.setup_ui()
         
     def setup_ui(self):
@@ -898,13 +1410,11 @@ class AddExpenseDialog:
         tk.Button(r_frame, text="Upload", command=self.upload_receipt).pack(side=tk.RIGHT)
         
         tk.Label(frame, text="Group", font=("Arial", 10, "bold")).pack(anchor="w", **pad)
-        groups = self.db.get_user_groups(self.uid)
-        g_opts = ["No Group (Personal)"] + [g['group_name'] for g in groups]
-        self.g_map = {g['group_name']: g['group_id'] for g in groups}
-        self.g_var = tk.StringVar(value=g_opts[0])
-        g_cb = ttk.Combobox(frame, textvariable=self.g_var, values=g_opts, state="readonly")
-        g_cb.pack(fill=tk.X, **pad)
-        g_cb.bind("<<ComboboxSelected>>", self.refresh_members)
+        self.g_var = tk.StringVar(value="No Group (Personal)")
+        self.g_cb = ttk.Combobox(frame, textvariable=self.g_var, state="readonly")
+        self.g_cb.pack(fill=tk.X, **pad)
+        self.g_cb.bind("<<ComboboxSelected>>", self.refresh_members)
+        self.load_groups()
         
         tk.Label(frame, text="Split Type", font=("Arial", 10, "bold")).pack(anchor="w", **pad)
         self.split_type = tk.StringVar(value="equal")
@@ -920,32 +1430,56 @@ class AddExpenseDialog:
         
         b_frame = tk.Frame(frame)
         b_frame.pack(pady=20)
-        tk.Button(b_frame, text="Save", bg="#4CAF50", fg="white", font=("Arial", 11, "bold"), padx=20, pady=10, command=self.save).pack(side=tk.LEFT, padx=10)
-        tk.Button(b_frame, text="Cancel", command=self.win.destroy).pack(side=tk.LEFT)
+        self.save_btn = tk.Button(b_frame, text="Save", bg="#4CAF50", fg="white", font=("Arial", 11, "bold"), padx=20, pady=10, command=self.save)
+        self.save_btn.pack(side=tk.LEFT, padx=10)
+        tk.Button(b_frame, text="Cancel", command=self.win.withdraw).pack(side=tk.LEFT)
         
         self.refresh_members()
 
+    def load_groups(self):
+        groups = self.db.get_user_groups(self.uid)
+        self.g_map = {g['group_name']: g['group_id'] for g in groups}
+        self.g_cb.config(values=["No Group (Personal)"] + list(self.g_map))
+
+    def reset(self, friends=None):
+        # Clear the form and reload data in place of building a new dialog. A save still
+        # running keeps its form and disabled button; on_saved closes or re-enables it
+        if self.pending: return
+        if friends is not None: self.friends = friends
+        self.members_by_group = {}
+        self.desc_ent.delete(0, tk.END)
+        self.amt_ent.delete(0, tk.END)
+        self.cat_var.set("General")
+        self.receipt_path = self.receipt_src = None
+        self.r_lbl.config(text="No file selected", fg="gray")
+        self.load_groups()
+        self.g_var.set("No Group (Personal)")
+        self.split_type.set("equal")
+        self.save_btn.config(state=tk.NORMAL, text="Save")
+        self.refresh_members()
+
     def upload_receipt(self):
         f = filedialog.askopenfilename(filetypes=[("Images", "*.png;*.jpg;*.jpeg;*.pdf")])
         if f:
             ext = os.path.splitext(f)[1]
             fname = f"receipt_{int(datetime.now().timestamp())}{ext}"
-            dest = os.path.join("receipts", fname)
-            shutil.copy(f, dest)
-            self.receipt_path = dest
+            # The copy itself happens on the worker thread when the expense is saved
+            self.receipt_src = f
+            self.receipt_path = os.path.join("receipts", fname)
             self.r_lbl.config(text=os.path.basename(f), fg="green")
 
     def refresh_members(self, event=None):
-        for w in self.members_frame.winfo_children(): w.destroy()
         g_name = self.g_var.get()
         self.participants = []
         
         if g_name == "No Group (Personal)":
             self.participants.append((self.uid, self.uname))
-            for f in self.db.get_friends(self.uid): self.participants.append((f['user_id'], f['username']))
+            for f in self.friends: self.participants.append((f['user_id'], f['username']))
         else:
             gid = self.g_map[g_name]
-            for m in self.db.get_group_members(gid): self.participants.append((m['user_id'], m['username']))
+            if gid not in self.members_by_group:
+                self.members_by_group[gid] = self.db.get_group_members(gid)
+            for m in self.members_by_group[gid]: self.participants.append((m['user_id'], m['username']))
         self.inputs = {}
         self.update_split_ui()
 
@@ -954,28 +1488,30 @@ class AddExpenseDialog:
         stype = self.split_type.get()
         self.inputs = {}
         
-        for uid, name in self.participants:
-            row = tk.Frame(self.members_frame)
-            row.pack(fill=tk.X, pady=2)
+        # Widgets are gridded straight into members_frame (no Frame per participant),
+        # so Tk lays the whole table out in one pass
+        frame = self.members_frame
+        for i, (uid, name) in enumerate(self.participants):
             var = tk.BooleanVar(value=True)
-            tk.Checkbutton(row, text=name, variable=var, width=15, anchor="w").pack(side=tk.LEFT)
+            tk.Checkbutton(frame, text=name, variable=var, width=15, anchor="w").grid(row=i, column=0, sticky="w", pady=2)
             
             if stype == "equal":
                 self.inputs[uid] = {'check': var, 'entry': None}
             elif stype == "exact":
-                tk.Label(row, text="$").pack(side=tk.LEFT)
-                ent = tk.Entry(row, width=10)
-                ent.pack(side=tk.LEFT)
+                tk.Label(frame, text="$").grid(row=i, column=1)
+                ent = tk.Entry(frame, width=10)
+                ent.grid(row=i, column=2, sticky="w")
                 ent.insert(0, "0.00")
                 self.inputs[uid] = {'check': var, 'entry': ent}
             elif stype == "percent":
-                ent = tk.Entry(row, width=5)
-                ent.pack(side=tk.LEFT)
+                ent = tk.Entry(frame, width=5)
+                ent.grid(row=i, column=1, sticky="w")
                 ent.insert(0, "0")
-                tk.Label(row, text="%").pack(side=tk.LEFT)
+                tk.Label(frame, text="%").grid(row=i, column=2, sticky="w")
                 self.inputs[uid] = {'check': var, 'entry': ent}
 
     def save(self):
+        if self.pending: return
         try:
             desc = self.desc_ent.get()
             total = float(self.amt_ent.get())
@@ -1003,11 +1539,29 @@ class AddExpenseDialog:
                     splits[uid], cpct = (p / 100.0) * total, cpct + p
                 if abs(cpct - 100) > 0.5: return messagebox.showerror("Error", "Percents must match 100%")
             
-            if self.db.add_expense(desc, total, cat, self.receipt_path, self.uid, gid, stype, splits):
-                messagebox.showinfo("Success", "Expense added!")
-                self.win.destroy()
+            # Receipt copy and DB write run on a worker; the dialog stays responsive meanwhile
+            src, dest = self.receipt_src, self.receipt_path
+            def store():
+                try:
+                    if src: shutil.copy(src, dest)
+                except OSError as e:
+                    print(e)
+                    return None
+                return self.db.add_expense(desc, total, cat, dest, self.uid, gid, stype, splits)
+            self.save_btn.config(state=tk.DISABLED, text="Saving…")
+            self.pending = self.db.run_in_background(store)
+            after_done(self.win, self.pending, self.on_saved)
         except Exception as e: messagebox.showerror("Error", str(e))
 
+    def on_saved(self, eid):
+        self.pending = None
+        if eid:
+            messagebox.showinfo("Success", "Expense added!")
+            self.win.withdraw()
+        else:
+            messagebox.showerror("Error", "Could not save the expense.")
+            self.save_btn.config(state=tk.NORMAL, text="Save")
+
 if __name__ == "__main__":
     db_mgr = DatabaseManager()
     root = tk.Tk()